@@ -1,8 +1,24 @@
 #!/usr/bin/env python3
 
+import functools
+import math
+import os
+import re
+import time
+from bisect import bisect_left
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Leave functions as plain Python when Numba is unavailable."""
+        return lambda func: func
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 # Basic function definitions
 def greet(name):
-    return f"Hello, {name}!"
+    return "Hello, " + name + "!"
 
 def add(a, b):
     """Add two numbers together."""
@@ -10,7 +26,7 @@ def add(a, b):
 
 # Functions with default parameters
 def greet_user(name, greeting="Hello"):
-    return f"{greeting}, {name}!"
+    return greeting + ", " + name + "!"
 
 # Functions with keyword arguments
 def create_person(name, age=None, email=None):
@@ -62,10 +78,31 @@ def fibonacci():
         yield a
         a, b = b, a + b
 
+# Compiled numeric entry points (results are int64, so exact up to
+# fib_nth(92) and factorial_jit(20))
+@njit(cache=True)
+def fib_nth(n):
+    """Return the n-th Fibonacci number."""
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+@njit(cache=True)
+def factorial_jit(n):
+    """Calculate factorial iteratively."""
+    result = 1
+    for i in range(2, n + 1):
+        result *= i
+    return result
+
+if os.environ.get("WARM_JIT"):
+    fib_nth(1)
+    factorial_jit(1)
+
 # Decorator functions
 def timer(func):
     """Decorator to time function execution."""
-    import time
     def wrapper(*args, **kwargs):
         start = time.time()
         result = func(*args, **kwargs)
@@ -76,11 +113,20 @@ def timer(func):
 
 def validate_types(*types):
     """Decorator to validate argument types."""
+    # Generate straight-line checks once instead of looping on every call
+    namespace = {f"T{i}": t for i, t in enumerate(types)}
+    # Tuples of types have no __name__, so fall back to their repr
+    namespace["type_name"] = lambda t: getattr(t, "__name__", repr(t))
+    lines = ["def check(args):", "    n = len(args)"]
+    for i in range(len(types)):
+        lines.append(f"    if n > {i} and not isinstance(args[{i}], T{i}):")
+        lines.append(f"        raise TypeError(f'Argument {i} must be {{type_name(T{i})}}')")
+    exec("\n".join(lines), namespace)
+    check = namespace["check"]
+
     def decorator(func):
         def wrapper(*args, **kwargs):
-            for i, (arg, expected_type) in enumerate(zip(args, types)):
-                if not isinstance(arg, expected_type):
-                    raise TypeError(f"Argument {i} must be {expected_type.__name__}")
+            check(args)
             return func(*args, **kwargs)
         return wrapper
     return decorator
@@ -117,30 +163,41 @@ class Calculator:
 
 # Async functions
 import asyncio
+from contextlib import nullcontext
 
-async def fetch_data(url):
+# Maximum number of fetches in flight at once
+FETCH_LIMIT = 64
+
+async def fetch_data(url, limit=None):
     """Fetch data from URL asynchronously."""
-    # Simulate async operation
-    await asyncio.sleep(1)
+    async with limit if limit is not None else nullcontext():
+        # Simulate async operation
+        await asyncio.sleep(1)
     return f"Data from {url}"
 
 async def process_multiple_urls(urls):
     """Process multiple URLs concurrently."""
-    tasks = [fetch_data(url) for url in urls]
-    return await asyncio.gather(*tasks)
-
-# Context manager functions
-from contextlib import contextmanager
+    limit = asyncio.Semaphore(FETCH_LIMIT)
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(fetch_data(url, limit)) for url in urls]
+    return [task.result() for task in tasks]
 
-@contextmanager
-def temporary_value(obj, attr, temp_value):
+# Context manager classes
+class temporary_value:
     """Temporarily set an attribute value."""
-    old_value = getattr(obj, attr)
-    setattr(obj, attr, temp_value)
-    try:
-        yield
-    finally:
-        setattr(obj, attr, old_value)
+    __slots__ = ('obj', 'attr', 'temp_value', 'old_value')
+
+    def __init__(self, obj, attr, temp_value):
+        self.obj = obj
+        self.attr = attr
+        self.temp_value = temp_value
+
+    def __enter__(self):
+        self.old_value = getattr(self.obj, self.attr)
+        setattr(self.obj, self.attr, self.temp_value)
+
+    def __exit__(self, *exc_info):
+        setattr(self.obj, self.attr, self.old_value)
 
 # Functions with error handling
 def safe_divide(a, b):
@@ -156,35 +213,26 @@ def safe_divide(a, b):
 
 def validate_email(email):
     """Validate email format."""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if re.match(pattern, email):
+    if EMAIL_RE.match(email):
         return True
     else:
         raise ValueError(f"Invalid email format: {email}")
 
-# Recursive functions
+# Memoized and iterative functions
+@functools.lru_cache(maxsize=128)
 def factorial(n):
-    """Calculate factorial recursively."""
-    if n <= 1:
-        return 1
-    return n * factorial(n - 1)
+    """Calculate factorial of an int, caching recent results."""
+    return math.prod(range(2, n + 1))
 
-def binary_search(arr, target, low=0, high=None):
+def binary_search(arr, target, low=0, high=None, key=None):
     """Binary search implementation."""
     if high is None:
         high = len(arr) - 1
     
-    if low > high:
-        return -1
-    
-    mid = (low + high) // 2
-    if arr[mid] == target:
-        return mid
-    elif arr[mid] > target:
-        return binary_search(arr, target, low, mid - 1)
-    else:
-        return binary_search(arr, target, mid + 1, high)
+    i = bisect_left(arr, target, low, high + 1, key=key)
+    if i <= high and (arr[i] if key is None else key(arr[i])) == target:
+        return i
+    return -1
 
 # Functions with unpacking
 def process_coordinates(point):
@@ -194,7 +242,16 @@ def process_coordinates(point):
 
 def merge_dicts(dict1, dict2):
     """Merge two dictionaries."""
-    return {**dict1, **dict2}
+    merged = dict(dict1)
+    merged.update(dict2)
+    return merged
+
+def merge_many(*dicts):
+    """Merge any number of dictionaries, later keys winning."""
+    merged = {}
+    for d in dicts:
+        merged.update(d)
+    return merged
 
 # Main execution
 if __name__ == "__main__":
@@ -6,16 +6,57 @@ This framework provides comprehensive testing capabilities for ast-grep patterns
 and transformations across multiple programming languages.
 """
 
+import functools
 import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, replace
+import re
 import subprocess
-import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-@dataclass
+try:
+    from ast_grep_py import SgRoot
+except ImportError:  # Fall back to the ast-grep CLI
+    SgRoot = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Below this many test cases, pool startup costs more than it saves
+PARALLEL_THRESHOLD = 4
+
+# Matches $VAR and $$$VAR; group 1 is the sigil, group 2 the name
+METAVAR_RE = re.compile(r'(\$\$\$|\$)([A-Z_][A-Z0-9_]*)')
+
+def _capture_vars(node: Any, pattern: str) -> Dict[str, str]:
+    """Collect the text captured by each single metavariable in pattern."""
+    captured = {}
+    for sigil, name in METAVAR_RE.findall(pattern):
+        match = node.get_match(name) if sigil == '$' else None
+        if match is not None:
+            captured[name] = match.text()
+    return captured
+
+def _expand_rewrite(node: Any, template: str, code: str) -> str:
+    """Expand $VAR and $$$VAR references in a rewrite template against node."""
+    def expand(m: 're.Match[str]') -> str:
+        sigil, name = m.groups()
+        if sigil == '$':
+            match = node.get_match(name)
+            return match.text() if match is not None else m.group(0)
+        # Multi matches include separators, so take the source span they cover
+        matches = node.get_multiple_matches(name)
+        if not matches:
+            return ''
+        return code[matches[0].range().start.index:matches[-1].range().end.index]
+    return METAVAR_RE.sub(expand, template)
+
+@dataclass(slots=True, frozen=True)
 class TestCase:
     """Represents a single test case for ast-grep patterns."""
     name: str
@@ -28,7 +69,7 @@ class TestCase:
     expected_replacement: Optional[str] = None
     description: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TestResult:
     """Represents the result of a test case execution."""
     test_case: TestCase
@@ -38,6 +79,13 @@ class TestResult:
     actual_replacement: Optional[str] = None
     error: Optional[str] = None
 
+@functools.lru_cache(maxsize=32)
+def _load_test_cases(json_file: str, mtime: float) -> Tuple[TestCase, ...]:
+    """Parse test cases from a JSON file, cached per path and modification time."""
+    raw = Path(json_file).read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return tuple(TestCase(**case_data) for case_data in data.get('test_cases', []))
+
 class AstGrepTester:
     """Main testing framework for ast-grep patterns."""
     
@@ -46,17 +94,24 @@ class AstGrepTester:
         self.test_cases: List[TestCase] = []
         self.results: List[TestResult] = []
         
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle without the suite, which pool workers get one case at a time."""
+        state = self.__dict__.copy()
+        state['test_cases'] = []
+        state['results'] = []
+        return state
+        
     def add_test_case(self, test_case: TestCase) -> None:
         """Add a test case to the test suite."""
         self.test_cases.append(test_case)
         
     def load_test_cases_from_json(self, json_file: str) -> None:
         """Load test cases from a JSON file."""
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-            for case_data in data.get('test_cases', []):
-                test_case = TestCase(**case_data)
-                self.add_test_case(test_case)
+        for test_case in _load_test_cases(json_file, os.path.getmtime(json_file)):
+            # Cached cases are shared between testers, so give each its own vars dict
+            if test_case.expected_vars is not None:
+                test_case = replace(test_case, expected_vars=dict(test_case.expected_vars))
+            self.add_test_case(test_case)
     
     def run_single_test(self, test_case: TestCase) -> TestResult:
         """Run a single test case and return the result."""
@@ -101,96 +156,91 @@ class AstGrepTester:
     
     def run_all_tests(self) -> List[TestResult]:
         """Run all test cases and return results."""
-        self.results = []
-        for test_case in self.test_cases:
-            result = self.run_single_test(test_case)
-            self.results.append(result)
+        if len(self.test_cases) < PARALLEL_THRESHOLD:
+            self.results = [self.run_single_test(tc) for tc in self.test_cases]
+        else:
+            # The native bindings hold the GIL while matching, so they need
+            # worker processes; the CLI fallback just waits on sg subprocesses,
+            # which threads can overlap without pickling anything
+            if SgRoot is not None:
+                executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+                chunksize = 4
+            else:
+                executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+                chunksize = 1
+            with executor:
+                self.results = list(executor.map(self.run_single_test, self.test_cases,
+                                                 chunksize=chunksize))
         return self.results
     
     def _run_ast_grep_search(self, code: str, pattern: str, language: str) -> List[Dict[str, Any]]:
-        """Run ast-grep search command and return matches."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix=f'.{self._get_file_extension(language)}', delete=False) as f:
-            f.write(code)
-            f.flush()
-            
-            try:
-                # Run ast-grep search
-                cmd = ['sg', 'search', '--pattern', pattern, '--lang', language, f.name]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-                
-                if result.returncode != 0:
-                    return []
-                
-                # Parse ast-grep output (simplified - in real implementation would parse JSON)
-                lines = result.stdout.strip().split('\n')
-                matches = []
-                if lines and lines[0]:
-                    # For simplicity, assume each non-empty line is a match
-                    for line in lines:
-                        if line.strip():
-                            matches.append({'text': line, 'vars': {}})
-                
-                return matches
-                
-            finally:
-                os.unlink(f.name)
+        """Run ast-grep search and return matches with their captured variables."""
+        if SgRoot is not None:
+            nodes = SgRoot(code, language).root().find_all(pattern=pattern)
+            return [{'text': n.text(), 'vars': _capture_vars(n, pattern)} for n in nodes]
+
+        matches = []
+        for match in self._run_sg_json(code, pattern, language):
+            single = match.get('metaVariables', {}).get('single', {})
+            matches.append({
+                'text': match.get('text', ''),
+                'vars': {name: var.get('text') for name, var in single.items()},
+            })
+        return matches
     
     def _run_ast_grep_replace(self, code: str, pattern: str, replacement: str, language: str) -> str:
-        """Run ast-grep replace command and return transformed code."""
-        with tempfile.NamedTemporaryFile(mode='w', suffix=f'.{self._get_file_extension(language)}', delete=False) as f:
-            f.write(code)
-            f.flush()
-            
-            try:
-                # Run ast-grep replace
-                cmd = ['sg', 'replace', '--pattern', pattern, '--replacement', replacement, '--lang', language, f.name]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-                
-                if result.returncode != 0:
-                    return code
-                
-                # Read the transformed file
-                with open(f.name, 'r') as transformed:
-                    return transformed.read()
-                
-            finally:
-                os.unlink(f.name)
+        """Run ast-grep replace and return transformed code."""
+        if SgRoot is not None:
+            # Splice into the original code rather than using commit_edits,
+            # which returns only the root node's text and drops leading whitespace
+            nodes = SgRoot(code, language).root().find_all(pattern=pattern)
+            edits = [(n.range(), _expand_rewrite(n, replacement, code)) for n in nodes]
+            for span, text in sorted(edits, key=lambda e: e[0].start.index, reverse=True):
+                code = code[:span.start.index] + text + code[span.end.index:]
+            return code
+
+        # Apply edits back to front so earlier byte offsets stay valid
+        source = code.encode()
+        matches = self._run_sg_json(code, pattern, language, replacement)
+        for match in sorted(matches, key=lambda m: m['range']['byteOffset']['start'], reverse=True):
+            offsets = match['range']['byteOffset']
+            source = source[:offsets['start']] + match['replacement'].encode() + source[offsets['end']:]
+        return source.decode()
     
-    def _get_file_extension(self, language: str) -> str:
-        """Get file extension for a programming language."""
-        extensions = {
-            'javascript': 'js',
-            'typescript': 'ts',
-            'python': 'py',
-            'rust': 'rs',
-            'go': 'go',
-            'java': 'java',
-            'c': 'c',
-            'cpp': 'cpp',
-            'csharp': 'cs',
-            'php': 'php',
-            'ruby': 'rb',
-            'swift': 'swift',
-            'kotlin': 'kt',
-            'scala': 'scala',
-            'bash': 'sh',
-            'html': 'html',
-            'css': 'css',
-            'json': 'json',
-            'yaml': 'yaml',
-        }
-        return extensions.get(language, 'txt')
+    def _run_sg_json(self, code: str, pattern: str, language: str,
+                     replacement: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run the ast-grep CLI on code piped through stdin and parse its JSON stream."""
+        cmd = ['sg', 'run', '--pattern', pattern, '--lang', language, '--json=stream', '--stdin']
+        if replacement is not None:
+            cmd[2:2] = ['--rewrite', replacement]
+        result = subprocess.run(cmd, input=code, capture_output=True, text=True, check=False)
+        
+        # sg exits with 1 when nothing matched; anything else is an error
+        # such as an invalid pattern, reported like the bindings would
+        if result.returncode == 1:
+            return []
+        if result.returncode != 0:
+            stderr = result.stderr
+            start = stderr.find('Error')
+            raise RuntimeError(stderr[start:].strip() if start != -1 else
+                               f"sg exited with status {result.returncode}")
+        
+        return [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
     
     def generate_report(self) -> str:
         """Generate a comprehensive test report."""
+        return ''.join(self._report_parts())
+    
+    def _report_parts(self) -> List[str]:
+        """Build the test report as a list of fragments to be joined or written."""
         if not self.results:
-            return "No test results available. Run tests first."
+            return ["No test results available. Run tests first."]
         
         total_tests = len(self.results)
         passed_tests = sum(1 for r in self.results if r.passed)
         failed_tests = total_tests - passed_tests
         
-        report = f"""
+        parts = [f"""
 # AST-Grep Test Report
 
 ## Summary
@@ -201,37 +251,36 @@ class AstGrepTester:
 
 ## Test Results
 
-"""
+"""]
         
         for result in self.results:
             status = "✅ PASSED" if result.passed else "❌ FAILED"
-            report += f"""
+            parts.append(f"""
 ### {result.test_case.name} - {status}
 - **Language**: {result.test_case.language}
 - **Pattern**: `{result.test_case.pattern}`
 - **Expected Matches**: {result.test_case.expected_matches}
 - **Actual Matches**: {result.actual_matches}
-"""
+""")
             
             if result.test_case.description:
-                report += f"- **Description**: {result.test_case.description}\n"
+                parts.append(f"- **Description**: {result.test_case.description}\n")
             
             if result.error:
-                report += f"- **Error**: {result.error}\n"
+                parts.append(f"- **Error**: {result.error}\n")
             
             if result.actual_vars:
-                report += f"- **Variables**: {result.actual_vars}\n"
+                parts.append(f"- **Variables**: {result.actual_vars}\n")
             
             if result.actual_replacement:
-                report += f"- **Replacement Result**: ```{result.test_case.language}\n{result.actual_replacement}\n```\n"
+                parts.append(f"- **Replacement Result**: ```{result.test_case.language}\n{result.actual_replacement}\n```\n")
         
-        return report
+        return parts
     
     def save_report(self, filename: str) -> None:
         """Save test report to file."""
-        report = self.generate_report()
         with open(filename, 'w') as f:
-            f.write(report)
+            f.writelines(self._report_parts())
     
     def create_sample_test_cases(self) -> None:
         """Create sample test cases for demonstration."""